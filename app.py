@@ -1,11 +1,22 @@
 import streamlit as st
 import os
 import tempfile
-from pdf_processor import process_pdf, get_page_count
-from ocr_processor import extract_text_from_image
+from pdf_processor import process_pdf, get_page_count, render_page_preview
+from ocr_processor import (extract_text_from_image, upscale_for_ocr, clear_ocr_cache, is_ocr_failure,
+                           MAX_OCR_PROCESSES, OCR_PAGE_CACHE_DIR, TESSDATA_DIR)
 import io
+import re
+import hashlib
+import pickle
+import logging
+from collections import defaultdict
 from PIL import Image
 
+try:
+    import ahocorasick
+except ImportError:  # Multi-term search falls back to per-term substring checks
+    ahocorasick = None
+
 # Set page configuration
 st.set_page_config(
     page_title="Enhanced PDF & Image Text Extractor",
@@ -41,7 +52,7 @@ with st.sidebar.expander("Advanced Settings"):
     # Set DPI setting
     dpi_options = {
         "Fast": 150,
-        "Standard": 300,
+        "Standard": 200,
         "High Quality": 400
     }
     
@@ -67,11 +78,40 @@ with st.sidebar.expander("Advanced Settings"):
         value=True,
         help="Apply advanced text cleanup for better readability"
     )
+    
+    # Binarization used before OCR
+    threshold_method = st.selectbox(
+        "Threshold method",
+        options=["Otsu", "Adaptive", "Global"],
+        index=0,
+        help="Otsu suits most scans, Adaptive handles uneven lighting, Global uses a fixed cut-off"
+    )
+    
+    # OCR pages even when the PDF already has a text layer
+    force_ocr = st.checkbox(
+        "Force OCR",
+        value=False,
+        help="Run OCR on every PDF page, even pages with embedded text"
+    )
+    
+    # Number of pages to render and OCR concurrently. Each OCR worker is a
+    # separate Tesseract process, so the default stops at MAX_OCR_PROCESSES
+    cpu_count = os.cpu_count() or 1
+    worker_threads = st.slider(
+        "Worker threads",
+        min_value=1,
+        max_value=max(cpu_count, 2),
+        value=min(cpu_count, MAX_OCR_PROCESSES),
+        help="More threads render and OCR more pages at once on multi-core machines"
+    )
 
 # Set settings in session state
 st.session_state.dpi = custom_dpi
 st.session_state.deskew = deskew_option
 st.session_state.text_cleaning = text_cleaning
+st.session_state.worker_threads = worker_threads
+st.session_state.force_ocr = force_ocr
+st.session_state.threshold_mode = threshold_method.lower()
 st.session_state.language_detect = language_detect
 st.session_state.ocr_quality = extraction_quality.lower().replace(" quality", "")
 
@@ -88,13 +128,174 @@ if 'search_term' not in st.session_state:
     st.session_state.search_term = ""
 if 'search_results' not in st.session_state:
     st.session_state.search_results = []
+if 'search_results_set' not in st.session_state:
+    st.session_state.search_results_set = frozenset()  # For O(1) membership checks
+if 'search_index' not in st.session_state:
+    st.session_state.search_index = ([], {})
 if 'file_processed' not in st.session_state:
     st.session_state.file_processed = False
 if 'file_name' not in st.session_state:
     st.session_state.file_name = ""
+if 'pdf_bytes' not in st.session_state:
+    st.session_state.pdf_bytes = None
 if 'view_mode' not in st.session_state:
     st.session_state.view_mode = "Text"  # Default to text view
 
+logger = logging.getLogger(__name__)
+
+# On-disk cache of processed uploads, so revisiting a document skips OCR.
+# Entries are pickles, so the directory must be private to the current user
+OCR_CACHE_DIR = OCR_PAGE_CACHE_DIR / "documents"
+OCR_CACHE_MAX_ENTRIES = 32
+
+def ensure_private_cache_dir():
+    """Create OCR_CACHE_DIR if needed and tell whether only the current user can write to it"""
+    OCR_CACHE_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    stat = OCR_CACHE_DIR.stat()
+    if hasattr(os, 'getuid') and (stat.st_uid != os.getuid() or stat.st_mode & 0o077):
+        logger.warning("Ignoring OCR cache directory %s: not private to the current user", OCR_CACHE_DIR)
+        return False
+    return True
+
+def get_cache_key(file_bytes, *settings):
+    """Build a cache key from the uploaded file's bytes and the extraction settings"""
+    digest = hashlib.blake2b(file_bytes, digest_size=16)
+    digest.update(repr(settings).encode())
+    return digest.hexdigest()
+
+def load_cached_result(cache_key):
+    """Load previously extracted (pages, texts) for a cache key, or None on a miss"""
+    cache_path = OCR_CACHE_DIR / f"{cache_key}.pkl"
+    try:
+        if not ensure_private_cache_dir():
+            return None
+        with cache_path.open('rb') as cache_file:
+            result = pickle.load(cache_file)
+        # Refresh the modification time so the LRU sweep keeps this entry
+        cache_path.touch()
+        return result
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.exception("Error reading OCR cache")
+        return None
+
+def save_cached_result(cache_key, pages, texts):
+    """Store extracted (pages, texts) for a cache key and evict the oldest entries"""
+    # Empty or failed extractions may succeed next time, so don't keep them
+    if not texts or any(is_ocr_failure(text) for text in texts):
+        return
+    try:
+        if not ensure_private_cache_dir():
+            return
+        # Write to a private temporary file first so readers never see a partial entry
+        with tempfile.NamedTemporaryFile('wb', dir=OCR_CACHE_DIR, suffix='.tmp', delete=False) as cache_file:
+            pickle.dump((pages, texts), cache_file)
+        os.replace(cache_file.name, OCR_CACHE_DIR / f"{cache_key}.pkl")
+        
+        entries = sorted(OCR_CACHE_DIR.glob("*.pkl"), key=lambda path: path.stat().st_mtime, reverse=True)
+        for stale_path in entries[OCR_CACHE_MAX_ENTRIES:]:
+            stale_path.unlink(missing_ok=True)
+    except Exception:
+        logger.exception("Error writing OCR cache")
+
+def encode_page_image(image, quality=85):
+    """Compress a page image to JPEG bytes for compact storage in session state"""
+    # Pages that still wrap their original JPEG stream are stored as-is,
+    # without decoding and re-encoding them
+    if image.format == "JPEG" and hasattr(image.fp, "getvalue"):
+        return image.fp.getvalue()
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    return buffer.getvalue()
+
+class OCRFailure(Exception):
+    """
+    Raised by the memoized extraction helpers when OCR could not run on a page
+    
+    Streamlit doesn't cache exceptions, so the result reaches the caller
+    through the exception while a retry after fixing Tesseract runs OCR again.
+    """
+    def __init__(self, pages, texts):
+        super().__init__("OCR could not run on every page")
+        self.pages = pages
+        self.texts = texts
+
+def raise_on_ocr_failure(pages, texts):
+    """Return (pages, texts), or raise OCRFailure if any text is an OCR failure message"""
+    if any(is_ocr_failure(text) for text in texts):
+        raise OCRFailure(pages, texts)
+    return pages, texts
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def ocr_pdf_file(pdf_bytes, dpi, page_limit, quality_level, force_ocr, threshold_mode, _worker_threads=None):
+    """
+    Extract pages and text from PDF bytes, memoized by Streamlit on the arguments
+    
+    Returns:
+    - list of JPEG-encoded page images
+    - list of extracted text (one string per page)
+    
+    Raises:
+        OCRFailure: OCR could not run on some page; the result is not memoized
+    """
+    pages, texts = process_pdf(
+        pdf_bytes,
+        dpi=dpi,
+        page_limit=page_limit,
+        quality_level=quality_level,
+        max_workers=_worker_threads,
+        thread_count=_worker_threads,
+        force_ocr=force_ocr,
+        threshold_mode=threshold_mode
+    )
+    # Keep pages as JPEG bytes rather than raw bitmaps to save memory. Pages
+    # that were never rasterized stay None and are rendered when viewed
+    return raise_on_ocr_failure([encode_page_image(page) if page is not None else None for page in pages], texts)
+
+# Pages with a usable text layer are never rasterized for OCR and are only
+# shown as previews, which don't need the extraction DPI
+PREVIEW_MAX_DPI = 100
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def preview_pdf_page(pdf_bytes, page_index, dpi):
+    """Render a PDF page that process_pdf skipped, memoized by Streamlit"""
+    return render_page_preview(pdf_bytes, page_index, dpi=dpi)
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def ocr_image_file(image_bytes, quality_level, upscale, threshold_mode):
+    """
+    Extract text from image bytes, memoized by Streamlit on the arguments
+    
+    Returns:
+    - single-item list with the JPEG-encoded image
+    - single-item list with the extracted text
+    
+    Raises:
+        OCRFailure: OCR could not run; the result is not memoized
+    """
+    image = Image.open(io.BytesIO(image_bytes))
+    if upscale:
+        # For high quality, resize low-resolution images towards 300 DPI
+        image = upscale_for_ocr(image)
+        ocr_source = image
+    else:
+        # OCR decodes its own copy, so large JPEGs can be decoded at reduced scale
+        ocr_source = io.BytesIO(image_bytes)
+    text = extract_text_from_image(ocr_source, quality_level=quality_level, threshold_mode=threshold_mode)
+    return raise_on_ocr_failure([encode_page_image(image)], [text])
+
+def clear_cached_results():
+    """Drop every cached extraction result, in memory and on disk"""
+    ocr_pdf_file.clear()
+    ocr_image_file.clear()
+    preview_pdf_page.clear()
+    clear_ocr_cache()
+    for cache_path in OCR_CACHE_DIR.glob("*.pkl"):
+        cache_path.unlink(missing_ok=True)
+
 def handle_file_upload():
     """Process uploaded file (PDF or image)"""
     uploaded_file = st.file_uploader("Upload a PDF or image file", type=["pdf", "png", "jpg", "jpeg", "tiff"])
@@ -107,25 +308,44 @@ def handle_file_upload():
             st.session_state.current_page = 0
             st.session_state.total_pages = 0
             st.session_state.search_results = []
+            st.session_state.search_results_set = frozenset()
+            st.session_state.search_index = ([], {})
             st.session_state.file_processed = False
             st.session_state.file_name = uploaded_file.name
+        
+        # PDF pages without a rendered image are drawn from these bytes when viewed
+        file_extension = os.path.splitext(uploaded_file.name)[1].lower()
+        st.session_state.pdf_bytes = uploaded_file.getvalue() if file_extension == '.pdf' else None
 
         if not st.session_state.file_processed:
-            file_extension = os.path.splitext(uploaded_file.name)[1].lower()
+            # Reuse earlier results for the same bytes and extraction settings
+            cache_key = get_cache_key(
+                uploaded_file.getvalue(),
+                st.session_state.dpi,
+                st.session_state.deskew,
+                st.session_state.ocr_quality,
+                st.session_state.language_detect,
+                st.session_state.force_ocr,
+                st.session_state.threshold_mode,
+                TESSDATA_DIR
+            )
+            cached_result = load_cached_result(cache_key)
             
             with st.spinner("Processing file..."):
-                if file_extension == '.pdf':
-                    # Create a temporary file to store the uploaded PDF
-                    with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-                        temp_file.write(uploaded_file.getvalue())
-                        temp_file_path = temp_file.name
+                if cached_result is not None:
+                    st.session_state.pdf_pages, st.session_state.extracted_text = cached_result
+                    st.session_state.total_pages = len(st.session_state.pdf_pages)
+                
+                elif file_extension == '.pdf':
+                    # Keep the PDF in memory; get_page_count and process_pdf both read these bytes
+                    pdf_bytes = uploaded_file.getvalue()
                     
                     # Show processing status
                     progress_bar = st.progress(0)
                     status_text = st.empty()
                     
                     # Get total pages for progress tracking
-                    total_pages = get_page_count(temp_file_path)
+                    total_pages = get_page_count(pdf_bytes)
                     if total_pages > 0:
                         status_text.text(f"Processing PDF with {total_pages} pages...")
                     
@@ -139,11 +359,19 @@ def handle_file_upload():
                         status_text.text(f"Large document detected ({total_pages} pages). Processing first 10 pages for faster results...")
                         page_limit = 10
                         
-                    st.session_state.pdf_pages, st.session_state.extracted_text = process_pdf(
-                        temp_file_path, 
-                        dpi=dpi,
-                        page_limit=page_limit
-                    )
+                    try:
+                        st.session_state.pdf_pages, st.session_state.extracted_text = ocr_pdf_file(
+                            pdf_bytes,
+                            dpi,
+                            page_limit,
+                            st.session_state.ocr_quality,
+                            st.session_state.force_ocr,
+                            st.session_state.threshold_mode,
+                            _worker_threads=st.session_state.worker_threads
+                        )
+                    except OCRFailure as failure:
+                        # Show the pages with their failure messages; nothing was cached
+                        st.session_state.pdf_pages, st.session_state.extracted_text = failure.pages, failure.texts
                     
                     # Inform user if we limited pages
                     if page_limit and total_pages > page_limit:
@@ -153,9 +381,6 @@ def handle_file_upload():
                     # Update progress
                     progress_bar.progress(100)
                     status_text.empty()
-                    
-                    # Remove temporary file
-                    os.unlink(temp_file_path)
                 
                 else:  # Image file
                     # Show processing status
@@ -164,33 +389,35 @@ def handle_file_upload():
                     status_text.text(f"Processing image with {extraction_quality} quality...")
                     progress_bar.progress(30)
                     
-                    # Process image file
-                    image = Image.open(uploaded_file)
-                    
                     # Apply preprocessing based on quality settings
-                    if extraction_quality == "High Quality":
-                        # For high quality, resize image to improve OCR
-                        width, height = image.size
-                        image = image.resize((int(width * 1.5), int(height * 1.5)), Image.LANCZOS)
+                    upscale = extraction_quality == "High Quality"
+                    if upscale:
                         status_text.text("Applying high-quality image processing...")
                     
                     progress_bar.progress(60)
-                    st.session_state.pdf_pages = [image]
                     
                     # Extract text with multiple methods for better reliability
                     status_text.text("Extracting text with OCR...")
-                    # Pass the quality level to the OCR engine
-                    extracted_text = extract_text_from_image(
-                        image, 
-                        quality_level=st.session_state.ocr_quality
-                    )
-                    st.session_state.extracted_text = [extracted_text]
+                    try:
+                        st.session_state.pdf_pages, st.session_state.extracted_text = ocr_image_file(
+                            uploaded_file.getvalue(),
+                            st.session_state.ocr_quality,
+                            upscale,
+                            st.session_state.threshold_mode
+                        )
+                    except OCRFailure as failure:
+                        st.session_state.pdf_pages, st.session_state.extracted_text = failure.pages, failure.texts
                     st.session_state.total_pages = 1
                     
                     # Update progress
                     progress_bar.progress(100)
                     status_text.empty()
                 
+                if cached_result is None:
+                    save_cached_result(cache_key, st.session_state.pdf_pages, st.session_state.extracted_text)
+                
+                # Index the text once so searches don't rescan every page
+                st.session_state.search_index = build_search_index(st.session_state.extracted_text)
                 st.session_state.file_processed = True
                 st.success(f"File processed successfully! Total pages: {st.session_state.total_pages}")
 
@@ -236,22 +463,88 @@ def display_navigation_controls():
         with col_indicator:
             st.markdown(f"**Page {st.session_state.current_page + 1} of {st.session_state.total_pages}**")
 
+def build_search_index(texts):
+    """
+    Build a trigram index over the extracted text for fast substring search
+    
+    Returns:
+    - list of lowercased page texts
+    - dict mapping each 3-character substring to the set of pages containing it
+    """
+    lowered = [text.lower() for text in texts]
+    trigram_index = defaultdict(set)
+    for page_num, text in enumerate(lowered):
+        for trigram in {text[i:i + 3] for i in range(len(text) - 2)}:
+            trigram_index[trigram].add(page_num)
+    return lowered, dict(trigram_index)
+
+# Separates alternative terms in a search query. Commas are too common in real
+# queries such as "1,000" or "Smith, John", while page text has its pipes
+# turned into I by text cleaning
+SEARCH_TERM_SEPARATOR = '|'
+
+def split_search_terms(search_term):
+    """Split a search query on SEARCH_TERM_SEPARATOR into its non-empty terms"""
+    return [term.strip() for term in search_term.split(SEARCH_TERM_SEPARATOR) if term.strip()]
+
+def get_search_automaton(terms):
+    """Return an Aho-Corasick automaton for terms, reusing the last one built"""
+    key = frozenset(terms)
+    cached_key, automaton = st.session_state.get('search_automaton', (None, None))
+    if cached_key != key:
+        automaton = ahocorasick.Automaton()
+        for term in key:
+            automaton.add_word(term, term)
+        automaton.make_automaton()
+        st.session_state.search_automaton = (key, automaton)
+    return automaton
+
+def _candidate_pages(term, lowered, trigram_index):
+    """Pages that may contain term according to the trigram index"""
+    if len(term) < 3:
+        # Too short to use the index, check every page
+        return set(range(len(lowered)))
+    # Only pages containing every trigram of the term can match
+    trigrams = {term[i:i + 3] for i in range(len(term) - 2)}
+    return set.intersection(*(trigram_index.get(trigram, set()) for trigram in trigrams))
+
+def search_pages(search_terms, search_index):
+    """Return the sorted page numbers whose text contains any of search_terms (case-insensitive)"""
+    lowered, trigram_index = search_index
+    terms = sorted({term.lower() for term in search_terms})
+    if not terms:
+        return []
+    
+    candidates = set().union(*(_candidate_pages(term, lowered, trigram_index) for term in terms))
+    
+    # Confirm candidates, since sharing trigrams doesn't guarantee a match.
+    # Several terms are matched in one pass over each page with Aho-Corasick.
+    if len(terms) > 1 and ahocorasick is not None:
+        automaton = get_search_automaton(terms)
+        contains_term = lambda text: next(automaton.iter(text), None) is not None
+    else:
+        contains_term = lambda text: any(term in text for term in terms)
+    
+    return [page_num for page_num in sorted(candidates) if contains_term(lowered[page_num])]
+
 def display_search_functionality():
     """Implement search functionality for extracted text"""
     if len(st.session_state.extracted_text) > 0:
-        search_term = st.text_input("Search in document", value=st.session_state.search_term)
+        search_term = st.text_input(
+            "Search in document",
+            value=st.session_state.search_term,
+            help=f"Separate alternative terms with {SEARCH_TERM_SEPARATOR}"
+        )
         
         if search_term != st.session_state.search_term:
             st.session_state.search_term = search_term
             
             if search_term:
-                # Search for the term in all pages
-                search_results = []
-                for page_num, text in enumerate(st.session_state.extracted_text):
-                    if search_term.lower() in text.lower():
-                        search_results.append(page_num)
+                # Look up candidate pages in the prebuilt index
+                search_results = search_pages(split_search_terms(search_term), st.session_state.search_index)
                 
                 st.session_state.search_results = search_results
+                st.session_state.search_results_set = frozenset(search_results)
                 
                 if search_results:
                     st.success(f"Found matches on {len(search_results)} pages")
@@ -263,6 +556,19 @@ def display_search_functionality():
                     st.warning("No matches found")
             else:
                 st.session_state.search_results = []
+                st.session_state.search_results_set = frozenset()
+
+def get_highlight_pattern(search_term):
+    """Return a case-insensitive regex matching any term of search_term literally, reusing the last one built"""
+    # Streamlit re-executes this script in a fresh module on every rerun, so
+    # the pattern is kept in session state rather than a module-level cache
+    cached_term, pattern = st.session_state.get('highlight_pattern', (None, None))
+    if cached_term != search_term:
+        # Prefer longer terms so overlapping matches highlight the whole term
+        terms = sorted(split_search_terms(search_term), key=len, reverse=True)
+        pattern = re.compile('|'.join(re.escape(term) for term in terms), re.IGNORECASE)
+        st.session_state.highlight_pattern = (search_term, pattern)
+    return pattern
 
 def display_content():
     """Display the current page content based on view mode"""
@@ -285,7 +591,7 @@ def display_content():
             current_page = st.session_state.current_page
             
             # Highlight the page number if it's in search results
-            if current_page in st.session_state.search_results and st.session_state.search_term:
+            if current_page in st.session_state.search_results_set and st.session_state.search_term:
                 st.markdown(f"<p style='background-color: #FFFF00;'>Page {current_page + 1} (Match found)</p>", 
                            unsafe_allow_html=True)
             
@@ -295,14 +601,10 @@ def display_content():
                     text = st.session_state.extracted_text[current_page]
                     
                     # Highlight search term if present
-                    if st.session_state.search_term and text:
+                    if split_search_terms(st.session_state.search_term) and text:
                         # Use regex for case-insensitive search
-                        import re
-                        pattern = re.compile(re.escape(st.session_state.search_term), re.IGNORECASE)
-                        highlighted_text = pattern.sub(
-                            f"**{st.session_state.search_term}**", 
-                            text
-                        )
+                        pattern = get_highlight_pattern(st.session_state.search_term)
+                        highlighted_text = pattern.sub(r"**\g<0>**", text)
                         st.markdown(highlighted_text)
                     else:
                         # Add text quality indicator
@@ -320,14 +622,23 @@ def display_content():
                     st.warning("No text content available for this page.")
             
             else:  # Original view
+                # Page images are only touched here, so Text view reruns never
+                # decode them; st.image receives the encoded bytes as-is
                 if current_page < len(st.session_state.pdf_pages):
-                    image = st.session_state.pdf_pages[current_page]
-                    st.image(image, caption=f"Page {current_page + 1}", use_container_width=True)
+                    page_bytes = st.session_state.pdf_pages[current_page]
+                    if page_bytes is None:
+                        page_bytes = preview_pdf_page(st.session_state.pdf_bytes, current_page,
+                                                      min(st.session_state.dpi, PREVIEW_MAX_DPI))
+                    st.image(page_bytes, caption=f"Page {current_page + 1}", use_container_width=True)
                 else:
                     st.warning("No image content available for this page.")
 
 def main():
     """Main application function"""
+    if st.sidebar.button("Clear cache", help="Forget stored results and re-run extraction"):
+        clear_cached_results()
+        st.session_state.file_processed = False
+    
     # File upload section
     handle_file_upload()
     
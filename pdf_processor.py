@@ -1,110 +1,379 @@
-import PyPDF2
+import pymupdf
 import pdf2image
+import pdf2image.exceptions
 import io
+import logging
 import re
+import os
+import functools
+import tempfile
+import threading
+from contextlib import contextmanager
 from PIL import Image
-from ocr_processor import extract_text_from_image, enhance_text_extraction
+from ocr_processor import (enhance_text_extraction, ocr_pages, ocr_worker_pool, is_ocr_failure,
+                           OCR_MAX_DIMENSION, NO_TEXT_MESSAGE)
 
-def get_page_count(pdf_path):
-    """Get the total number of pages in a PDF file"""
+logger = logging.getLogger(__name__)
+
+# Raised when the PDF itself is missing or damaged. Nothing else can read it
+# either, so callers give up at once instead of trying fallbacks
+_UNREADABLE_PDF_ERRORS = (FileNotFoundError, pymupdf.FileNotFoundError, pymupdf.FileDataError)
+# Raised when poppler can't rasterize pages for OCR; the text layer may still be usable
+_RENDER_ERRORS = (
+    pdf2image.exceptions.PDFInfoNotInstalledError,
+    pdf2image.exceptions.PDFPageCountError,
+    pdf2image.exceptions.PDFSyntaxError,
+    pdf2image.exceptions.PDFPopplerTimeoutError,
+    OSError,
+)
+
+# MuPDF must not be entered from two threads at once, even for different
+# documents, and Streamlit runs every session on its own thread. All MuPDF
+# calls, opening documents included, therefore hold this one lock. It is
+# reentrant so a helper can open a document its caller already holds
+_MUPDF_LOCK = threading.RLock()
+
+# Parsed documents are cached so get_page_count, process_pdf and page previews
+# share one parse of the cross-reference table. Callers hold _MUPDF_LOCK
+@functools.lru_cache(maxsize=4)
+def _document_from_bytes(pdf_bytes):
+    """Parse in-memory PDF bytes once and share the document between callers"""
+    return pymupdf.open(stream=pdf_bytes, filetype="pdf")
+
+@functools.lru_cache(maxsize=4)
+def _document_from_path(path, mtime_ns, size):
+    """Parse a PDF file once per version; mtime and size invalidate the entry"""
+    return pymupdf.open(path)
+
+@contextmanager
+def open_pdf_document(pdf_source):
+    """Borrow the shared PyMuPDF document for a PDF given as a file path or as raw bytes"""
+    if not isinstance(pdf_source, (bytes, bytearray)):
+        stat = os.stat(pdf_source)
+    with _MUPDF_LOCK:
+        if isinstance(pdf_source, (bytes, bytearray)):
+            doc = _document_from_bytes(bytes(pdf_source))
+        else:
+            doc = _document_from_path(os.fspath(pdf_source), stat.st_mtime_ns, stat.st_size)
+        # PyMuPDF opens password-protected files but refuses to read their pages,
+        # so report them as unreadable up front
+        if doc.needs_pass:
+            raise pymupdf.FileDataError("PDF is password protected")
+        yield doc
+
+def convert_pdf_to_images(pdf_source, **kwargs):
+    """Rasterize a PDF given as a file path or as raw bytes with pdf2image"""
+    if isinstance(pdf_source, (bytes, bytearray)):
+        return pdf2image.convert_from_bytes(pdf_source, **kwargs)
+    return pdf2image.convert_from_path(pdf_source, **kwargs)
+
+# Quality of the JPEG files pages are spooled to; high enough that
+# compression artifacts don't disturb OCR
+SPOOL_JPEG_QUALITY = 90
+
+def spool_pdf_pages(pdf_source, spool_dir, dpi=200, thread_count=None, **kwargs):
+    """
+    Rasterize PDF pages to JPEG files in spool_dir
+    
+    Several poppler processes render pages in parallel and write them straight
+    to disk, instead of accumulating uncompressed bitmaps in memory. JPEG is
+    much quicker to write than PNG and lets OCR decode pages at reduced scale.
+    
+    Args:
+        pdf_source: Path to the PDF file, or the PDF contents as bytes
+        spool_dir: Directory the page files are written to
+        dpi: Render resolution
+        thread_count: Number of poppler processes (defaults to one less than the CPU count)
+        **kwargs: Further pdf2image options such as first_page and last_page
+        
+    Returns:
+        List of page image paths in page order
+    """
+    if thread_count is None:
+        thread_count = max(1, (os.cpu_count() or 2) - 1)
+    return convert_pdf_to_images(
+        pdf_source, dpi=dpi, thread_count=thread_count, output_folder=spool_dir,
+        paths_only=True, fmt='jpeg', jpegopt={"quality": SPOOL_JPEG_QUALITY}, **kwargs
+    )
+
+def contiguous_runs(indices):
+    """Group sorted page indices into (first, last) runs of consecutive pages"""
+    runs = []
+    for index in indices:
+        if runs and index == runs[-1][1] + 1:
+            runs[-1][1] = index
+        else:
+            runs.append([index, index])
+    return [tuple(run) for run in runs]
+
+def render_page_preview(pdf_source, page_index, dpi=100, quality=85):
+    """
+    Render one PDF page to JPEG bytes for display
+    
+    Used for pages process_pdf did not rasterize. MuPDF renders in-process,
+    which is far cheaper than a poppler run for a single page.
+    
+    Args:
+        pdf_source: Path to the PDF file, or the PDF contents as bytes
+        page_index: Zero-based page number
+        dpi: Render resolution
+        quality: JPEG quality
+        
+    Returns:
+        JPEG-encoded page image
+    """
+    with open_pdf_document(pdf_source) as doc:
+        pixmap = doc[page_index].get_pixmap(dpi=dpi)
+        return pixmap.tobytes("jpeg", jpg_quality=quality)
+
+def get_page_count(pdf_source):
+    """Get the total number of pages in a PDF file path or PDF bytes"""
     try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            return len(pdf_reader.pages)
-    except Exception as e:
-        print(f"Error getting page count: {e}")
+        with open_pdf_document(pdf_source) as doc:
+            return doc.page_count
+    except _UNREADABLE_PDF_ERRORS:
+        logger.exception("Error getting page count")
         return 0
 
+# Common OCR character errors, fixed in a single pass
+_CLEAN_TRANS = str.maketrans({'|': 'I'})
+# A zero between two letters is almost always a misread O. Only that context is
+# fixed: rewriting every 0 as O corrupted numbers such as years and amounts
+_ALPHA_ZERO_RE = re.compile(r'(?<=[A-Za-z])0(?=[A-Za-z])')
+_WS_RE = re.compile(r'\s+')
+
 def clean_text(text):
     """Clean and normalize extracted text"""
     if not text:
         return ""
         
     # Remove excessive whitespace
-    text = re.sub(r'\s+', ' ', text).strip()
+    text = _WS_RE.sub(' ', text).strip()
     # Fix common OCR errors
-    text = text.replace('|', 'I').replace('0', 'O')
+    text = text.translate(_CLEAN_TRANS)
+    text = _ALPHA_ZERO_RE.sub('O', text)
     return text
 
-def process_pdf(pdf_path, dpi=300, page_limit=None):
+def extract_page_texts(pdf_source, page_count):
+    """
+    Extract and clean the native text layer of the first page_count pages
+    
+    Args:
+        pdf_source: Path to the PDF file, or the PDF contents as bytes
+        page_count: Number of leading pages to extract
+        
+    Returns:
+        List of cleaned text, one string per page
+    """
+    with open_pdf_document(pdf_source) as doc:
+        return [clean_text(doc[i].get_text("text")) for i in range(page_count)]
+
+# Pages needing OCR are rendered, OCR'd and cleared from the spool directory
+# this many at a time, so disk use stays bounded on long scans. A multiple of
+# the OCR worker count keeps every worker busy through each chunk
+RENDER_CHUNK_PAGES = 12
+
+# Pages OCR'd below this DPI whose OCR comes back sparse are rendered and
+# OCR'd again at this resolution...
+ESCALATION_DPI = 300
+# ...or lower, so that the retry image stays within this many pixels a side
+ESCALATION_MAX_DIMENSION = 3500
+
+def escalation_dpi(page_extent):
+    """Resolution to retry a page at, given its longest side in points"""
+    return max(1, min(ESCALATION_DPI, int(ESCALATION_MAX_DIMENSION * 72 / page_extent)))
+
+# Pages whose text layer has at least this many printable characters skip OCR
+MIN_TEXT_LAYER_CHARS = 50
+# ...unless more than this share of them is non-ASCII, which usually means a
+# broken font encoding rather than real text
+MAX_NON_ASCII_RATIO = 0.3
+# ...or too few of the visible characters are printable, or letters and digits
+# (private-use glyphs and symbol soup from unmapped ligatures)
+MIN_PRINTABLE_RATIO = 0.85
+MIN_ALNUM_RATIO = 0.4
+# Only the start of a page is inspected, so the check costs the same on every page
+TEXT_LAYER_SAMPLE_CHARS = 2000
+
+def has_text_layer(text):
+    """Check whether text extracted from a PDF page is substantial and clean enough to skip OCR"""
+    visible = [char for char in text[:TEXT_LAYER_SAMPLE_CHARS] if not char.isspace()]
+    printable = [char for char in visible if char.isprintable()]
+    if len(printable) < MIN_TEXT_LAYER_CHARS:
+        return False
+    non_ascii = sum(1 for char in printable if not char.isascii())
+    alnum = sum(1 for char in printable if char.isalnum())
+    return (non_ascii <= len(printable) * MAX_NON_ASCII_RATIO
+            and len(printable) >= len(visible) * MIN_PRINTABLE_RATIO
+            and alnum >= len(visible) * MIN_ALNUM_RATIO)
+
+def process_pdf(pdf_source, dpi=200, page_limit=None, quality_level="standard", max_workers=None,
+                thread_count=None, force_ocr=False, threshold_mode="otsu", want_images=True):
     """
     Process a PDF file, extracting both images and text using multiple methods
     for improved reliability
     
     Args:
-        pdf_path: Path to the PDF file
-        dpi: DPI for image conversion (higher = better quality but slower)
+        pdf_source: Path to the PDF file, or the PDF contents as bytes
+        dpi: DPI for image conversion (higher = better quality but slower).
+            Pages with sparse OCR results are retried at up to ESCALATION_DPI
         page_limit: Maximum number of pages to process (None for all pages)
+        quality_level: OCR quality level (fast, standard, high)
+        max_workers: Number of worker processes used to OCR pages concurrently
+        thread_count: Number of poppler processes used to rasterize pages
+            (defaults to one less than the CPU count)
+        force_ocr: OCR every page even when it has a usable text layer
+        threshold_mode: Binarization used for OCR preprocessing (otsu, adaptive, global)
+        want_images: Keep the rendered page images. Callers that only need
+            text pass False and receive None for every page
         
     Returns:
-    - list of PIL Image objects (one per page)
+    - list of lazily decoded PIL Image objects (one per page; None for pages that were not
+      rasterized because their text layer made OCR unnecessary, see
+      render_page_preview, or for every page when want_images is False)
     - list of extracted text (one string per page)
     """
     pdf_images = []
     extracted_texts = []
     
     try:
-        # Convert PDF pages to images with specified DPI for better OCR results
-        images = pdf2image.convert_from_path(pdf_path, dpi=dpi)
-        pdf_images = images
-        
-        # Process each page with multiple extraction methods
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            
+        # Method 1: Extract text directly from PDF with MuPDF's native parser
+        with open_pdf_document(pdf_source) as doc:
             # If page_limit is specified, process only that many pages
-            total_pages = len(pdf_reader.pages)
+            total_pages = doc.page_count
             pages_to_process = total_pages
             
             if page_limit and page_limit > 0:
                 pages_to_process = min(page_limit, total_pages)
-                # Truncate images list to match the limit
-                pdf_images = images[:pages_to_process]
             
-            for i, page in enumerate(pdf_reader.pages[:pages_to_process]):
-                # Method 1: Extract text directly from PDF
-                pdf_text = page.extract_text() or ""
-                pdf_text = clean_text(pdf_text)
+            # Longest side of each page in points (1/72 inch)
+            page_extents = [max(doc[i].rect.width, doc[i].rect.height) for i in range(pages_to_process)]
+        
+        pdf_texts = extract_page_texts(pdf_source, pages_to_process)
+        
+        # Pages that already have a usable text layer skip OCR, and are not
+        # rasterized at all
+        pdf_images = [None] * pages_to_process
+        ocr_indices = [
+            i for i, pdf_text in enumerate(pdf_texts)
+            if force_ocr or not has_text_layer(pdf_text)
+        ]
+        
+        # Convert the remaining pages to images with specified DPI for better
+        # OCR results, a chunk of pages at a time with one poppler run per range
+        # of consecutive pages. Pages are spooled to disk rather than held in
+        # memory: OCR workers receive file paths and each opens, reads and
+        # drops its own page. One pool of OCR workers serves every chunk
+        ocr_texts = {}
+        page_dpis = {}
+        with tempfile.TemporaryDirectory() as spool_dir, ocr_worker_pool(max_workers) as ocr_pool:
+            for start in range(0, len(ocr_indices), RENDER_CHUNK_PAGES):
+                image_paths = {}
+                for first, last in contiguous_runs(ocr_indices[start:start + RENDER_CHUNK_PAGES]):
+                    # OCR shrinks pages to OCR_MAX_DIMENSION pixels anyway, so don't
+                    # have poppler render pixels that would be thrown straight away
+                    largest_page = max(page_extents[first:last + 1])
+                    run_dpi = max(1, min(dpi, int(OCR_MAX_DIMENSION * 72 / largest_page)))
+                    run_paths = spool_pdf_pages(
+                        pdf_source, spool_dir, dpi=run_dpi, thread_count=thread_count,
+                        first_page=first + 1, last_page=last + 1
+                    )
+                    image_paths.update(zip(range(first, last + 1), run_paths))
+                    page_dpis.update(dict.fromkeys(range(first, last + 1), run_dpi))
                 
-                # Method 2: Use OCR on the page image
-                ocr_text = ""
-                if i < len(images):  # Ensure we have the corresponding image
-                    # Get quality setting from session state if available
-                    import streamlit as st
-                    quality_level = "standard"
-                    if hasattr(st, "session_state") and hasattr(st.session_state, "ocr_quality"):
-                        quality_level = st.session_state.ocr_quality
-                    
-                    ocr_text = extract_text_from_image(images[i], quality_level=quality_level)
-                    ocr_text = clean_text(ocr_text)
+                # Method 2: Use OCR on the page images, several pages at a time
+                run_indices = list(image_paths)
+                ocr_results = ocr_pages(
+                    list(image_paths.values()),
+                    quality_level=quality_level,
+                    max_workers=max_workers,
+                    threshold_mode=threshold_mode,
+                    executor=ocr_pool
+                )
+                run_texts = {i: clean_text(text) for i, text in zip(run_indices, ocr_results)}
                 
-                # Choose the best result or combine them
-                if len(pdf_text) > len(ocr_text) * 1.5:
-                    # PDF extraction gave significantly more text
-                    final_text = pdf_text
-                elif len(ocr_text) > len(pdf_text) * 1.2:
-                    # OCR gave significantly more text
-                    final_text = ocr_text
-                else:
-                    # Try to get the best of both worlds by enhancing
-                    final_text = enhance_text_extraction(pdf_text, ocr_text)
+                # Tesseract is tuned for 200-300 DPI, so most pages OCR fine at the
+                # resolution they were rendered at. Pages that yielded only a little
+                # text are rendered again one at a time at up to ESCALATION_DPI
+                # and OCR'd without the usual size cap. Empty and failed pages
+                # would come back the same way, so they are not retried
+                retry_indices = [
+                    i for i, text in zip(run_indices, ocr_results)
+                    if text.strip() and text != NO_TEXT_MESSAGE and not is_ocr_failure(text)
+                    and not has_text_layer(text) and page_dpis[i] < escalation_dpi(page_extents[i])
+                ]
+                if retry_indices:
+                    retry_paths = [
+                        spool_pdf_pages(pdf_source, spool_dir, dpi=escalation_dpi(page_extents[i]), thread_count=1,
+                                        first_page=i + 1, last_page=i + 1)[0]
+                        for i in retry_indices
+                    ]
+                    retry_results = ocr_pages(
+                        retry_paths,
+                        quality_level=quality_level,
+                        max_workers=max_workers,
+                        threshold_mode=threshold_mode,
+                        max_dimension=ESCALATION_MAX_DIMENSION,
+                        executor=ocr_pool
+                    )
+                    for i, text, path in zip(retry_indices, retry_results, retry_paths):
+                        text = clean_text(text)
+                        if not is_ocr_failure(text) and len(text) > len(run_texts[i]):
+                            run_texts[i] = text
+                        os.remove(path)
+                ocr_texts.update(run_texts)
                 
-                extracted_texts.append(final_text)
+                # Keep the page images for display as their compressed JPEG bytes
+                # rather than decoded bitmaps. Image.open only parses the header,
+                # so a page is decoded only if something actually reads its pixels
+                for i, path in image_paths.items():
+                    if not want_images:
+                        os.remove(path)
+                        continue
+                    with open(path, 'rb') as page_file:
+                        image = Image.open(io.BytesIO(page_file.read()))
+                    os.remove(path)
+                    # Record the render resolution alongside the page
+                    image.info['dpi'] = (page_dpis[i], page_dpis[i])
+                    pdf_images[i] = image
+        
+        for i, pdf_text in enumerate(pdf_texts):
+            if i not in ocr_texts:
+                # Native text is good enough, or there is no page image to OCR
+                extracted_texts.append(pdf_text)
+                continue
+            
+            ocr_text = ocr_texts[i]
+            # Choose the best result or combine them
+            if len(pdf_text) > len(ocr_text) * 1.5:
+                # PDF extraction gave significantly more text
+                final_text = pdf_text
+            elif len(ocr_text) > len(pdf_text) * 1.2:
+                # OCR gave significantly more text
+                final_text = ocr_text
+            else:
+                # Try to get the best of both worlds by enhancing
+                final_text = enhance_text_extraction(pdf_text, ocr_text)
+            
+            extracted_texts.append(final_text)
         
         return pdf_images, extracted_texts
         
-    except Exception as e:
-        print(f"Error processing PDF: {e}")
+    except _UNREADABLE_PDF_ERRORS:
+        logger.exception("Could not open PDF")
+        return [], []
+    
+    except _RENDER_ERRORS:
+        logger.exception("Error processing PDF")
         # Try fallback methods if main process failed
         try:
             fallback_images = []
             fallback_texts = []
             
             # Fallback method 1: Try to extract just text directly
-            with open(pdf_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page in pdf_reader.pages:
-                    text = page.extract_text() or "Text extraction failed"
+            with open_pdf_document(pdf_source) as doc:
+                for page in doc:
+                    text = page.get_text("text") or "Text extraction failed"
                     fallback_texts.append(text)
                     
             # If we got text but no images, try to at least get blank images
@@ -113,15 +382,15 @@ def process_pdf(pdf_path, dpi=300, page_limit=None):
                 page_count = len(fallback_texts)
                 for _ in range(page_count):
                     # Create a blank white image
-                    blank = Image.new('RGB', (800, 1100), (255, 255, 255))
+                    blank = Image.new('RGB', (800, 1100), (255, 255, 255)) if want_images else None
                     fallback_images.append(blank)
                     
             if fallback_images and fallback_texts:
-                print("Used fallback method for PDF processing")
+                logger.warning("Used fallback method for PDF processing")
                 return fallback_images, fallback_texts
                 
-        except Exception as fallback_error:
-            print(f"Fallback processing also failed: {fallback_error}")
+        except (RuntimeError, ValueError):
+            logger.exception("Fallback processing also failed")
         
         return [], []
 
@@ -130,25 +399,16 @@ def extract_text_from_pdf_file(pdf_file):
     text_content = []
     
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        for page in pdf_reader.pages:
-            text = page.extract_text() or ""
-            text = clean_text(text)
-            text_content.append(text)
+        pdf_bytes = pdf_file.read()
+        text_content = extract_page_texts(pdf_bytes, get_page_count(pdf_bytes))
         
         # If all pages returned empty text, something likely went wrong
         if all(not text for text in text_content):
             # Convert to images and try OCR as fallback
-            pdf_bytes = pdf_file.read()
-            with open("temp_file.pdf", "wb") as f:
-                f.write(pdf_bytes)
-            
-            images = pdf2image.convert_from_path("temp_file.pdf")
-            text_content = [extract_text_from_image(img) for img in images]
-            import os
-            os.remove("temp_file.pdf")
+            with tempfile.TemporaryDirectory() as spool_dir:
+                text_content = ocr_pages(spool_pdf_pages(pdf_bytes, spool_dir))
         
         return text_content
-    except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+    except _UNREADABLE_PDF_ERRORS + _RENDER_ERRORS:
+        logger.exception("Error extracting text from PDF")
         return []